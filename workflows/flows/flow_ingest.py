@@ -8,17 +8,99 @@ sys.path.insert(0, str(workflows_dir))
 
 from prefect import flow
 from prefect.logging import get_run_logger
-from typing import List, Optional
+from typing import List, Optional, Tuple
+from minio.datatypes import Object as MinioObject
 
 from tasks.tasks_list_files import list_minio_objects
 from tasks.tasks_gps import extract_gps_coordinates
+from tasks.tasks_db import register_data_assets, register_gps_records
+from tasks.tasks_previews import generate_image_previews, is_derived_object, DEFAULT_PREVIEW_SIZES
+
+import pandas as pd
+
+# Only these are registered as ingest assets
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.tif', '.tiff', '.png')
+
+
+def ingest_objects(
+    objects: List[MinioObject],
+    bucket_name: str,
+    previews: bool = False,
+    preview_sizes: Tuple[int, ...] = DEFAULT_PREVIEW_SIZES,
+) -> List[str]:
+    """
+    Run the per-object ingest pipeline (GPS, database rows, previews).
+
+    Shared by the batch ingest flow and the notification listener; must be
+    called from within a flow.
+
+    Returns:
+        List[str]: Names of objects whose ingest failed and should be retried
+    """
+    logger = get_run_logger()
+
+    # Previews and metadata written by earlier runs share the bucket; skip them
+    objects = [obj for obj in objects if not is_derived_object(obj.object_name)]
+    failed = set()
+
+    # Extract GPS coordinates (if present) per image object
+    gps_frames = []
+    for obj in objects:
+        try:
+            gps_frames.append(extract_gps_coordinates(
+                minio_objects=[obj],
+                bucket_name=bucket_name,
+                raise_errors=True
+            ))
+        except Exception:
+            # Continue ingest even if GPS extraction fails for this object
+            failed.add(obj.object_name)
+            continue
+
+    # Register objects and GPS rows in bulk rather than one insert per image
+    image_names = [
+        obj.object_name for obj in objects
+        if obj.object_name.lower().endswith(IMAGE_EXTENSIONS)
+    ]
+    try:
+        register_data_assets(
+            keys_by_type={"ingest": image_names},
+            bucket_name=bucket_name,
+        )
+    except Exception as e:
+        logger.warning(f"Failed to register ingest assets in database: {e}")
+        failed.update(image_names)
+
+    frames = [df for df in gps_frames if df is not None and not df.empty]
+    if frames:
+        gps_df = pd.concat(frames, ignore_index=True)
+        try:
+            register_gps_records(
+                gps_df=gps_df,
+                bucket_name=bucket_name,
+            )
+        except Exception as e:
+            logger.warning(f"Failed to register GPS records in database: {e}")
+            failed.update(gps_df["filename"])
+
+    if previews:
+        results = generate_image_previews(
+            minio_objects=objects,
+            bucket_name=bucket_name,
+            sizes=preview_sizes,
+        )
+        failed.update(name for name, keys in results.items() if keys is None)
+
+    return sorted(failed)
 
 
 @flow
 def ingest_flow(
     bucket_name: str,
     prefix: str = "",
-    recursive: bool = True
+    recursive: bool = True,
+    previews: bool = False,
+    preview_sizes: Tuple[int, ...] = DEFAULT_PREVIEW_SIZES,
 ) -> List[str]:
     """
     Flow that ingests data by listing objects in a MinIO bucket.
@@ -30,6 +112,8 @@ def ingest_flow(
         access_key (str): Access key (user ID) for MinIO
         secret_key (str): Secret key (password) for MinIO
         recursive (bool): List objects recursively if True
+        previews (bool): Generate downscaled previews under previews/ if True
+        preview_sizes (Tuple[int, ...]): Longest-edge pixel sizes of the previews
         
     Returns:
         List[str]: A list of object names found in the bucket with the given prefix
@@ -44,16 +128,12 @@ def ingest_flow(
         recursive=recursive
     )
     
-    # Extract GPS coordinates (if present) per image object
-    for obj in objects:
-        try:
-            extract_gps_coordinates(
-                minio_objects=[obj],
-                bucket_name=bucket_name
-            )
-        except Exception:
-            # Continue ingest even if GPS extraction fails for this object
-            continue
+    ingest_objects(
+        objects=objects,
+        bucket_name=bucket_name,
+        previews=previews,
+        preview_sizes=preview_sizes,
+    )
     
     logger.info(f"Ingest flow completed. Found {len(objects)} objects.")
     return [obj.object_name for obj in objects]
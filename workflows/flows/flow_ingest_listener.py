@@ -0,0 +1,137 @@
+import sys
+import os
+import time
+from pathlib import Path
+
+# Add the workflows directory to Python path
+workflows_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(workflows_dir))
+
+from prefect import flow
+from prefect.logging import get_run_logger
+from typing import List, Tuple
+from datetime import datetime, timezone
+from minio import Minio
+from minio.datatypes import Object as MinioObject
+
+from flows.flow_ingest import ingest_objects
+from tasks.tasks_notifications import (
+    ListenerState,
+    NotificationStreamError,
+    batch_object_events,
+    list_minio_objects_since,
+    load_listener_checkpoint,
+    save_listener_checkpoint,
+    start_object_created_listener,
+)
+from tasks.tasks_previews import DEFAULT_PREVIEW_SIZES
+
+
+@flow
+def ingest_listener_flow(
+    bucket_name: str,
+    prefix: str = "ingest/",
+    max_batch_size: int = 500,
+    max_batch_wait: float = 5.0,
+    dedup_window: int = 100_000,
+    reconnect_delay: float = 1.0,
+    max_reconnect_delay: float = 60.0,
+    previews: bool = False,
+    preview_sizes: Tuple[int, ...] = DEFAULT_PREVIEW_SIZES,
+    endpoint: str = "localhost:9050",
+    access_key: str = "minioadmin",
+    secret_key: str = "minioadmin",
+) -> None:
+    """
+    Long-running flow that ingests new uploads from MinIO bucket notifications.
+
+    Listens for s3:ObjectCreated:* events under the prefix and runs the ingest
+    pipeline on micro-batches of new objects. Objects the pipeline writes
+    (meta/, previews/, the checkpoint) are ignored. Failed objects are retried
+    with every following batch, and the checkpoint under meta/checkpoints/
+    never advances past the oldest one still failing. When the stream drops,
+    the pending batch is flushed, the listener reconnects with exponential
+    backoff and lists only objects modified since the checkpoint (or since
+    it started, if nothing was checkpointed yet). Without a checkpoint,
+    objects uploaded before the first start are left to the batch ingest_flow.
+
+    Args:
+        bucket_name (str): The name of the bucket to listen on
+        prefix (str): Only objects under this prefix are ingested
+        max_batch_size (int): Maximum objects per micro-batch
+        max_batch_wait (float): Seconds to wait after the first event before flushing a batch
+        dedup_window (int): Number of recent (key, etag) pairs remembered to drop repeated events
+        reconnect_delay (float): Initial delay in seconds before reconnecting a dropped stream
+        max_reconnect_delay (float): Upper bound of the exponential reconnect backoff
+        previews (bool): Generate downscaled previews under previews/ if True
+        preview_sizes (Tuple[int, ...]): Longest-edge pixel sizes of the previews
+        endpoint (str): MinIO server endpoint
+        access_key (str): Access key (user ID) for MinIO
+        secret_key (str): Secret key (password) for MinIO
+    """
+    logger = get_run_logger()
+    logger.info(f"Starting ingest listener for bucket: {bucket_name} with prefix: {prefix}")
+
+    client = Minio(
+        endpoint=endpoint,
+        access_key=access_key,
+        secret_key=secret_key,
+        secure=False
+    )
+
+    state = ListenerState(load_listener_checkpoint(client, bucket_name, prefix), dedup_window)
+
+    def ingest(objects: List[MinioObject]) -> List[str]:
+        logger.info(f"Ingesting batch of {len(objects)} objects")
+        failed = ingest_objects(
+            objects=objects,
+            bucket_name=bucket_name,
+            previews=previews,
+            preview_sizes=preview_sizes,
+        )
+        if failed:
+            logger.warning(f"{len(failed)} objects failed to ingest and will be retried")
+        return failed
+
+    def process(objects: List[MinioObject]) -> None:
+        if state.process(objects, ingest):
+            save_listener_checkpoint(client, bucket_name, prefix, state.checkpoint)
+
+    def catch_up(since: datetime) -> None:
+        missed = list_minio_objects_since(
+            bucket_name=bucket_name,
+            prefix=prefix,
+            since=since,
+            endpoint=endpoint,
+            access_key=access_key,
+            secret_key=secret_key,
+        )
+        for start in range(0, len(missed), max_batch_size):
+            process(missed[start:start + max_batch_size])
+
+    started_at = datetime.now(timezone.utc)
+    connected_before = False
+    delay = reconnect_delay
+    while True:
+        # Subscribe before catching up so nothing uploaded in between is missed;
+        # overlap between the two is dropped by the dedup window
+        events = start_object_created_listener(client, bucket_name, prefix)
+
+        since = state.checkpoint if state.checkpoint is not None else (started_at if connected_before else None)
+        if since is not None:
+            catch_up(since)
+        connected_before = True
+
+        try:
+            for batch in batch_object_events(events, max_batch_size, max_batch_wait):
+                process(batch)
+                delay = reconnect_delay
+        except NotificationStreamError as e:
+            logger.warning(f"{e}; reconnecting in {delay:.0f}s")
+            time.sleep(delay)
+            delay = min(delay * 2, max_reconnect_delay)
+
+
+if __name__ == "__main__":
+    # Example usage
+    ingest_listener_flow(bucket_name="hydra-data", prefix="ingest/")
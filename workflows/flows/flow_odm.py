@@ -12,7 +12,97 @@ from typing import List, Optional, Dict
 
 from tasks.tasks_list_files import list_minio_objects
 from tasks.tasks_odm import process_images_with_odm, upload_directory_to_minio
-from tasks.task_create_asset import create_data_asset
+from tasks.tasks_cog import convert_rasters_to_cog
+from tasks.tasks_db import group_keys_by_product, register_data_assets
+from tasks.tasks_flights import load_image_metadata, group_images_into_flights
+
+
+def process_image_set(
+    image_objects: List,
+    odm_options: Optional[Dict],
+    node_url: str,
+    node_port: int,
+    output_dir: str,
+    results_bucket: str,
+    run_prefix: str,
+    minio_config: Dict,
+) -> Dict:
+    """
+    Run one image set through ODM, convert its rasters to COGs, upload the
+    results under `run_prefix` and register them as data assets.
+
+    Must be called from within a flow.
+    """
+    logger = get_run_logger()
+
+    # Process images with ODM
+    result = process_images_with_odm(
+        images=image_objects,
+        odm_options=odm_options,
+        node_url=node_url,
+        node_port=node_port,
+        output_dir=output_dir,
+        minio_config=minio_config
+    )
+    
+    # Rewrite the orthophoto/DEM in place as COGs so viewers can range-read small areas
+    cog_files = []
+    try:
+        cog_files = convert_rasters_to_cog(output_dir=result["output_dir"])
+    except Exception as e:
+        logger.warning(f"Failed to create Cloud-Optimized GeoTIFFs: {e}")
+
+    # Upload results back to MinIO
+    assets_created = {}
+    try:
+        uploaded_keys = upload_directory_to_minio(
+            local_dir=result["output_dir"],
+            bucket_name=results_bucket,
+            prefix=run_prefix,
+            endpoint=minio_config["endpoint"],
+            access_key=minio_config["access_key"],
+            secret_key=minio_config["secret_key"],
+            secure=False,
+        )
+
+        # Group uploaded objects by known ODM product directories/files
+        known_products = [
+            "odm_dem",
+            "entwine_pointcloud",
+            "odm_orthophoto",
+            "odm_report",
+            "odm_georeferencing",
+            "odm_texturing",
+            "log.json",
+            "images.json",
+            "task_output.txt",
+            "cameras.json",
+        ]
+
+        # Single pass over uploaded keys, then one bulk registration for all products
+        keys_by_product = group_keys_by_product(
+            keys=uploaded_keys,
+            prefix=run_prefix,
+            products=known_products,
+        )
+        try:
+            assets_created = register_data_assets(
+                keys_by_type=keys_by_product,
+                bucket_name=results_bucket,
+            )
+        except Exception as e:
+            logger.warning(f"Failed to create assets for ODM products: {e}")
+
+    except Exception as e:
+        logger.warning(f"Failed to upload results to MinIO or create assets: {e}")
+
+    return {
+        **result,
+        "results_bucket": results_bucket,
+        "results_prefix": run_prefix,
+        "assets_created": assets_created,
+        "cog_files": cog_files,
+    }
 
 
 @flow
@@ -26,14 +116,18 @@ def process_drone_imagery(
     recursive: bool = True,
     results_bucket_name: Optional[str] = None,
     results_prefix: Optional[str] = None,
+    group_flights: bool = False,
+    grouping_options: Optional[Dict] = None,
 ) -> Dict:
     """
     Flow that processes drone imagery using OpenDroneMap.
     
     This flow:
     1. Lists all images in the specified MinIO bucket/prefix
-    2. Downloads and processes them with ODM
-    3. Stores results and creates artifacts
+    2. Optionally groups them into flights from ingest metadata
+    3. Downloads and processes each image set with ODM
+    4. Rewrites the orthophoto and DEM rasters as tiled COGs in place
+    5. Stores results and creates artifacts
     
     Args:
         bucket_name (str): The MinIO bucket containing drone images
@@ -43,9 +137,14 @@ def process_drone_imagery(
         node_port (int): Port of the ODM node
         output_dir (str): Where to store ODM results
         recursive (bool): Whether to search for images recursively
+        group_flights (bool): Split the images into flights and run one ODM job per flight
+        grouping_options (Dict, optional): Keyword arguments for group_images_into_flights
         
     Returns:
         Dict: Contains ODM task info, output paths, and processing statistics
+
+    Raises:
+        ValueError: If group_flights is set and no ingest metadata or no flights are found
     """
     logger = get_run_logger()
     logger.info(f"Starting drone imagery processing flow for bucket: {bucket_name}")
@@ -89,85 +188,83 @@ def process_drone_imagery(
         "secret_key": "minioadmin"
     }
     
-    # Process images with ODM
-    result = process_images_with_odm(
-        images=image_objects,
-        odm_options=odm_options,
-        node_url=node_url,
-        node_port=node_port,
-        output_dir=output_dir,
-        minio_config=minio_config
-    )
-    
-    # Upload results back to MinIO
-    assets_created = {}
-    try:
-        results_bucket = results_bucket_name or bucket_name
-        # Derive a reasonable results prefix
-        default_prefix = f"odm_results/{Path(output_dir).name}"
-        run_prefix = (results_prefix or default_prefix).strip("/")
-
-        uploaded_keys = upload_directory_to_minio(
-            local_dir=result["output_dir"],
-            bucket_name=results_bucket,
-            prefix=run_prefix,
-            endpoint=minio_config["endpoint"],
-            access_key=minio_config["access_key"],
-            secret_key=minio_config["secret_key"],
-            secure=False,
-        )
+    results_bucket = results_bucket_name or bucket_name
+    # Derive a reasonable results prefix
+    default_prefix = f"odm_results/{Path(output_dir).name}"
+    run_prefix = (results_prefix or default_prefix).strip("/")
 
-        # Group uploaded objects by known ODM product directories/files
-        known_products = [
-            "odm_dem",
-            "entwine_pointcloud",
-            "odm_orthophoto",
-            "odm_report",
-            "odm_georeferencing",
-            "odm_texturing",
-            "log.json",
-            "images.json",
-            "task_output.txt",
-            "cameras.json",
-        ]
+    flow_stats = {
+        "total_objects_found": len(objects),
+        "total_images_processed": len(image_objects),
+        "bucket_name": bucket_name,
+        "prefix": prefix
+    }
 
-        for product in known_products:
-            if product.endswith('.json') or product.endswith('.txt'):
-                # Single file
-                key = f"{run_prefix}/{product}"
-                matched = [k for k in uploaded_keys if k == key]
-            else:
-                # Directory
-                prefix_key = f"{run_prefix}/{product}/"
-                matched = [k for k in uploaded_keys if k.startswith(prefix_key)]
-
-            if matched:
-                try:
-                    asset = create_data_asset(
-                        minio_objects=matched,
-                        bucket_name=results_bucket,
-                        asset_type=product,
-                    )
-                    assets_created[product] = asset
-                except Exception as e:
-                    logger.warning(f"Failed to create asset for {product}: {e}")
+    if not group_flights:
+        result = process_image_set(
+            image_objects=image_objects,
+            odm_options=odm_options,
+            node_url=node_url,
+            node_port=node_port,
+            output_dir=output_dir,
+            results_bucket=results_bucket,
+            run_prefix=run_prefix,
+            minio_config=minio_config,
+        )
+        # Enhance the result with flow-level information
+        final_result = {**result, "flow_stats": flow_stats}
+    else:
+        # One ODM job per flight, built from ingest metadata without touching the images
+        metadata = load_image_metadata(
+            minio_objects=image_objects,
+            bucket_name=bucket_name,
+        )
+        if metadata.empty:
+            raise ValueError(
+                f"No ingest metadata found for {len(image_objects)} images in "
+                f"{bucket_name}/{prefix}; run ingest_flow on them before grouping flights"
+            )
+        flights = group_images_into_flights(
+            metadata=metadata,
+            **(grouping_options or {}),
+        )
+        if not flights:
+            raise ValueError(
+                f"No flights found among {len(metadata)} images with ingest metadata; "
+                f"check their EXIF capture times or relax grouping_options"
+            )
+        objects_by_name = {obj.object_name: obj for obj in image_objects}
 
-    except Exception as e:
-        logger.warning(f"Failed to upload results to MinIO or create assets: {e}")
+        flight_results = []
+        for index, names in enumerate(flights, start=1):
+            flight_id = f"flight-{index:03d}"
+            logger.info(f"Processing {flight_id} with {len(names)} images")
+            flight_results.append({
+                "flight": flight_id,
+                **process_image_set(
+                    image_objects=[objects_by_name[name] for name in names],
+                    odm_options=odm_options,
+                    node_url=node_url,
+                    node_port=node_port,
+                    output_dir=str(Path(output_dir) / flight_id),
+                    results_bucket=results_bucket,
+                    run_prefix=f"{run_prefix}/{flight_id}",
+                    minio_config=minio_config,
+                ),
+            })
 
-    # Enhance the result with flow-level information
-    final_result = {
-        **result,
-        "flow_stats": {
-            "total_objects_found": len(objects),
-            "total_images_processed": len(image_objects),
-            "bucket_name": bucket_name,
-            "prefix": prefix
-        },
-        "results_bucket": results_bucket_name or bucket_name,
-        "results_prefix": (results_prefix or f"odm_results/{Path(output_dir).name}").strip("/"),
-        "assets_created": assets_created,
-    }
+        final_result = {
+            "status": "grouped",
+            "output_dir": output_dir,
+            "flights": flight_results,
+            "flow_stats": {
+                **flow_stats,
+                "total_images_processed": sum(len(names) for names in flights),
+                "flights": len(flights),
+            },
+            "results_bucket": results_bucket,
+            "results_prefix": run_prefix,
+        }
     
     logger.info(
         f"Flow completed successfully. Processed {len(image_objects)} images. "
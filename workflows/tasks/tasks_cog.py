@@ -0,0 +1,190 @@
+from typing import Dict, List, Tuple
+from prefect import task
+from prefect.logging import get_run_logger
+from prefect.artifacts import create_table_artifact
+from datetime import timedelta
+from minio import Minio
+from pathlib import Path
+import os
+import rasterio
+from rasterio.shutil import copy as rio_copy
+from rasterio.errors import WindowError
+from rasterio.transform import Affine
+from rasterio.windows import Window, from_bounds
+
+# Canonical ODM rasters rewritten as COGs, per product directory
+COG_SOURCES = {
+    "odm_orthophoto": ("odm_orthophoto.tif",),
+    "odm_dem": ("dsm.tif", "dtm.tif"),
+}
+# Suffix of the file a COG is written to before it replaces its source
+COG_TMP_SUFFIX = ".cog.tmp"
+
+# GDAL settings so remote reads only fetch the header and the tiles needed
+COG_READ_ENV = {
+    "GDAL_DISABLE_READDIR_ON_OPEN": "EMPTY_DIR",
+    "GDAL_HTTP_MERGE_CONSECUTIVE_RANGES": "YES",
+    "GDAL_HTTP_MULTIPLEX": "YES",
+    "VSI_CACHE": "TRUE",
+}
+
+
+def is_cog(path: Path) -> bool:
+    """Return True if the GeoTIFF at `path` already has the COG layout"""
+    with rasterio.open(path) as src:
+        return src.tags(ns="IMAGE_STRUCTURE").get("LAYOUT") == "COG"
+
+
+@task
+def convert_rasters_to_cog(
+    output_dir: str,
+    sources: Dict[str, Tuple[str, ...]] = COG_SOURCES,
+    blocksize: int = 512,
+    compress: str = "DEFLATE",
+) -> List[str]:
+    """
+    Rewrite the canonical ODM orthophoto and DEM rasters in place as
+    internally tiled, overviewed Cloud-Optimized GeoTIFFs.
+
+    Compression is lossless and a COG is a regular GeoTIFF, so the files
+    keep their ODM names and sidecars such as `odm_orthophoto.tfw` stay
+    valid. Each raster is written to a temporary file that replaces the
+    source only once complete; a raster that fails to convert is left as it
+    was. Side files such as `odm_orthophoto.original.tif` are not converted,
+    and rasters that already have the COG layout are not rewritten.
+
+    Args:
+        output_dir (str): ODM results directory (as returned by run_odm_task)
+        sources (Dict[str, Tuple[str, ...]]): Raster file names to convert per product directory
+        blocksize (int): Internal tile size in pixels
+        compress (str): GDAL compression for the tiles
+
+    Returns:
+        List[str]: Paths of the rasters that are COGs after the call
+    """
+    logger = get_run_logger()
+
+    src_paths = [
+        Path(output_dir) / product / name
+        for product, names in sources.items()
+        for name in names
+        if (Path(output_dir) / product / name).is_file()
+    ]
+
+    converted: List[str] = []
+    written: List[str] = []
+    for src_path in src_paths:
+        tmp_path = src_path.with_name(src_path.name + COG_TMP_SUFFIX)
+        try:
+            if is_cog(src_path):
+                logger.info(f"Already a COG: {src_path}")
+                converted.append(str(src_path))
+                continue
+
+            logger.info(f"Writing COG {src_path}")
+            # The GDAL COG driver tiles the raster and builds overviews down to a single tile
+            rio_copy(
+                str(src_path),
+                str(tmp_path),
+                driver="COG",
+                blocksize=blocksize,
+                compress=compress,
+                predictor="YES",
+                overview_resampling="average",
+                bigtiff="IF_SAFER",
+            )
+            os.replace(tmp_path, src_path)
+            converted.append(str(src_path))
+            written.append(str(src_path))
+        except Exception as e:
+            logger.error(f"Failed to convert {src_path} to COG, keeping the original: {e}")
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+    if written:
+        create_table_artifact(
+            key="odm-cog-files",
+            table=[{"file": Path(p).name, "path": p} for p in written],
+            description=f"Cloud-Optimized GeoTIFFs in {output_dir}"
+        )
+
+    logger.info(f"Wrote {len(written)} COG files in {output_dir}")
+    return converted
+
+
+def _read_window(src, bbox: Tuple[float, float, float, float], zoom: int) -> Dict:
+    """Read `bbox` from an open raster at overview level `zoom`; see read_cog_window"""
+    zoom = max(0, min(zoom, len(src.overviews(1))))
+
+    # Clip to the raster so no tiles outside it are requested
+    try:
+        window = from_bounds(*bbox, transform=src.transform).intersection(
+            Window(0, 0, src.width, src.height)
+        ).round_offsets().round_lengths()
+    except WindowError:
+        window = None
+    if window is None or window.width < 1 or window.height < 1:
+        raise ValueError(f"bbox {bbox} does not intersect the raster bounds {tuple(src.bounds)}")
+
+    # A decimated read is served from the overview at that scale
+    factor = 2 ** zoom
+    out_height = max(1, int(window.height) // factor)
+    out_width = max(1, int(window.width) // factor)
+    data = src.read(window=window, out_shape=(src.count, out_height, out_width))
+    transform = src.window_transform(window) @ Affine.scale(
+        window.width / out_width, window.height / out_height
+    )
+    return {
+        "data": data,
+        "transform": transform,
+        "crs": src.crs,
+        "nodata": src.nodata,
+        "zoom": zoom,
+    }
+
+
+def read_cog_window(
+    bucket_name: str,
+    object_name: str,
+    bbox: Tuple[float, float, float, float],
+    zoom: int = 0,
+    endpoint: str = "localhost:9050",
+    access_key: str = "minioadmin",
+    secret_key: str = "minioadmin",
+    expires: timedelta = timedelta(minutes=15),
+) -> Dict:
+    """
+    Read the pixels of a COG in MinIO that cover a bounding box.
+
+    The object is opened through a presigned URL, so GDAL issues HTTP range
+    requests for the header and only the tiles intersecting `bbox`; for
+    `zoom` > 0 those tiles come from the matching overview.
+
+    Args:
+        bucket_name (str): Bucket holding the COG
+        object_name (str): Key of the COG, e.g. <run prefix>/odm_orthophoto/odm_orthophoto.tif
+        bbox (Tuple[float, float, float, float]): (minx, miny, maxx, maxy) in the raster CRS
+        zoom (int): 0 reads full resolution, n reads the n-th overview (each halving
+            resolution); clamped to the number of overviews in the file
+        endpoint (str): MinIO server endpoint
+        access_key (str): MinIO access key
+        secret_key (str): MinIO secret key
+        expires (timedelta): Lifetime of the presigned URL
+
+    Returns:
+        Dict: `data` (bands x rows x cols array), `transform`, `crs`, `nodata` and the `zoom` read
+
+    Raises:
+        ValueError: If `bbox` does not intersect the raster
+    """
+    client = Minio(
+        endpoint=endpoint,
+        access_key=access_key,
+        secret_key=secret_key,
+        secure=False
+    )
+    url = client.presigned_get_object(bucket_name, object_name, expires=expires)
+
+    with rasterio.Env(**COG_READ_ENV):
+        with rasterio.open(f"/vsicurl/{url}") as src:
+            return _read_window(src, bbox, zoom)
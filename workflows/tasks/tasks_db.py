@@ -0,0 +1,224 @@
+from typing import Dict, Iterable, List, Optional, TYPE_CHECKING
+from prefect import task
+from prefect.logging import get_run_logger
+from datetime import datetime
+import pandas as pd
+import atexit
+
+if TYPE_CHECKING:
+    from prisma import Prisma
+
+# Single Prisma client reused by every task in this process
+_db: Optional["Prisma"] = None
+
+DEFAULT_OWNER_UUID = "00000000-0000-0000-0000-000000000000"
+DEFAULT_BATCH_SIZE = 5000
+
+
+def get_db() -> "Prisma":
+    """
+    Return the shared Prisma client, connecting it on first use.
+
+    The client is generated from models/schema.prisma (`prisma generate`);
+    importing it is deferred so flows still load when it has not been
+    generated, and registration fails per call instead.
+    """
+    global _db
+    if _db is None:
+        from prisma import Prisma
+        _db = Prisma()
+        atexit.register(close_db)
+    if not _db.is_connected():
+        _db.connect()
+    return _db
+
+
+def close_db() -> None:
+    """Disconnect the shared Prisma client if it is connected"""
+    if _db is not None and _db.is_connected():
+        _db.disconnect()
+
+
+def _chunks(items: List, size: int) -> Iterable[List]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def group_keys_by_product(
+    keys: List[str],
+    prefix: str,
+    products: List[str],
+) -> Dict[str, List[str]]:
+    """
+    Group object keys under `prefix` by ODM product in a single pass.
+
+    Products ending in .json/.txt are matched as single files directly under
+    the prefix; every other product is matched as a directory.
+
+    Args:
+        keys (List[str]): Object keys, e.g. as returned by upload_directory_to_minio
+        prefix (str): Prefix the products were uploaded under
+        products (List[str]): Known product directory/file names
+
+    Returns:
+        Dict[str, List[str]]: Matched keys per product (products without keys are omitted)
+    """
+    file_products = {p for p in products if p.endswith(('.json', '.txt'))}
+    dir_products = set(products) - file_products
+
+    norm_prefix = prefix.strip("/")
+    base = f"{norm_prefix}/" if norm_prefix else ""
+
+    grouped: Dict[str, List[str]] = {}
+    for key in keys:
+        if not key.startswith(base):
+            continue
+        rel = key[len(base):]
+        head, sep, _ = rel.partition("/")
+        if sep and head in dir_products:
+            grouped.setdefault(head, []).append(key)
+        elif not sep and rel in file_products:
+            grouped.setdefault(rel, []).append(key)
+    return grouped
+
+
+@task
+def register_data_assets(
+    keys_by_type: Dict[str, List[str]],
+    bucket_name: str,
+    owner_uuid: str = DEFAULT_OWNER_UUID,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Dict[str, int]:
+    """
+    Register MinIO objects as DataAsset rows using batched create_many calls.
+
+    Args:
+        keys_by_type (Dict[str, List[str]]): Object keys grouped by asset type
+        bucket_name (str): Bucket the objects live in
+        owner_uuid (str): Owner recorded on every asset
+        batch_size (int): Maximum rows per create_many call
+
+    Returns:
+        Dict[str, int]: Number of object keys submitted per asset type
+    """
+    logger = get_run_logger()
+
+    rows = [
+        {
+            "path": key,
+            "storage_type": "minio",
+            "storage_location": bucket_name,
+            "asset_type": asset_type,
+            "owner_uuid": owner_uuid,
+        }
+        for asset_type, keys in keys_by_type.items()
+        for key in keys
+    ]
+    if not rows:
+        logger.info("No data assets to register")
+        return {}
+
+    db = get_db()
+    inserted = 0
+    for chunk in _chunks(rows, batch_size):
+        # Rows already present (unique on storage_location + path) are skipped
+        inserted += db.dataasset.create_many(data=chunk, skip_duplicates=True)
+
+    logger.info(
+        f"Registered {inserted} new data assets ({len(rows)} submitted) in bucket '{bucket_name}'"
+    )
+    return {asset_type: len(keys) for asset_type, keys in keys_by_type.items()}
+
+
+@task
+def register_gps_records(
+    gps_df: pd.DataFrame,
+    bucket_name: str,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> int:
+    """
+    Upsert per-image GPS rows (as produced by extract_gps_coordinates).
+
+    Each chunk of upserts is sent as a single batched transaction, so
+    re-ingesting an image updates its row instead of failing.
+
+    Args:
+        gps_df (pd.DataFrame): DataFrame with filename, latitude, longitude, size, last_modified,
+            capture_time and camera
+        bucket_name (str): Bucket the images live in
+        batch_size (int): Maximum upserts per batch
+
+    Returns:
+        int: Number of GPS rows written
+    """
+    logger = get_run_logger()
+
+    if gps_df is None or gps_df.empty:
+        logger.info("No GPS records to register")
+        return 0
+
+    records = []
+    for row in gps_df.to_dict(orient="records"):
+        last_modified = row.get("last_modified")
+        if isinstance(last_modified, str):
+            last_modified = datetime.fromisoformat(last_modified)
+        capture_time = row.get("capture_time")
+        camera = row.get("camera")
+        records.append({
+            "path": str(row["filename"]),
+            "storage_location": bucket_name,
+            "latitude": float(row["latitude"]),
+            "longitude": float(row["longitude"]),
+            "size": int(row["size"]),
+            "last_modified": last_modified,
+            "capture_time": datetime.fromisoformat(capture_time) if isinstance(capture_time, str) else None,
+            "camera": camera if isinstance(camera, str) else None,
+        })
+
+    db = get_db()
+    for chunk in _chunks(records, batch_size):
+        with db.batch_() as batcher:
+            for record in chunk:
+                batcher.gpsrecord.upsert(
+                    where={"storage_location_path": {
+                        "storage_location": record["storage_location"],
+                        "path": record["path"],
+                    }},
+                    data={"create": record, "update": record},
+                )
+
+    logger.info(f"Registered {len(records)} GPS records for bucket '{bucket_name}'")
+    return len(records)
+
+
+def find_gps_records(
+    paths: List[str],
+    bucket_name: str,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> List[Dict]:
+    """
+    Fetch GPS rows for the given object paths, one query per `batch_size` paths.
+
+    Returns records shaped like the meta/<object key>.gps.json documents, with
+    `capture_time` as a naive ISO string on the camera clock.
+    """
+    db = get_db()
+    records = []
+    for chunk in _chunks(paths, batch_size):
+        rows = db.gpsrecord.find_many(
+            where={"storage_location": bucket_name, "path": {"in": chunk}}
+        )
+        for row in rows:
+            records.append({
+                "filename": row.path,
+                "latitude": row.latitude,
+                "longitude": row.longitude,
+                "size": row.size,
+                "last_modified": row.last_modified.isoformat() if row.last_modified else None,
+                # Stored without a zone; drop the UTC tag Prisma adds on read
+                "capture_time": (
+                    row.capture_time.replace(tzinfo=None).isoformat() if row.capture_time else None
+                ),
+                "camera": row.camera,
+            })
+    return records
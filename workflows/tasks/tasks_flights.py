@@ -0,0 +1,252 @@
+from typing import List, Tuple
+from prefect import task
+from prefect.logging import get_run_logger
+from prefect.artifacts import create_table_artifact
+from minio import Minio
+from minio.datatypes import Object as MinioObject
+from minio.error import S3Error
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+import posixpath
+import json
+
+from tasks.tasks_db import DEFAULT_BATCH_SIZE, find_gps_records
+from tasks.tasks_gps import gps_meta_key
+
+EARTH_RADIUS_M = 6_371_000.0
+
+
+def _haversine_m(lat1, lon1, lat2, lon2):
+    """Great-circle distance in metres between arrays of coordinates"""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(a))
+
+
+def _legacy_meta_key(object_name: str) -> str:
+    """Key of the meta/<basename>.gps.json documents written before keys included the path"""
+    return f"meta/{posixpath.basename(object_name)}.gps.json"
+
+
+@task
+def load_image_metadata(
+    minio_objects: List[MinioObject],
+    bucket_name: str,
+    max_workers: int = 16,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    endpoint: str = "localhost:9050",
+    access_key: str = "minioadmin",
+    secret_key: str = "minioadmin"
+) -> pd.DataFrame:
+    """
+    Load the per-image metadata recorded by the ingest flow.
+
+    Rows come from the GpsRecord table, one query per `batch_size` images.
+    Images without a row carrying a capture time (or all images, if the
+    database is unavailable) fall back to the meta/<object key>.gps.json
+    documents, then to the meta/<basename>.gps.json layout of earlier
+    ingests. Documents recorded for a different object are ignored.
+
+    Args:
+        minio_objects (List[MinioObject]): Image objects to load metadata for
+        bucket_name (str): Name of the MinIO bucket
+        max_workers (int): Number of metadata documents fetched in parallel
+        batch_size (int): Maximum images per database query
+        endpoint (str): MinIO server endpoint
+        access_key (str): MinIO access key
+        secret_key (str): MinIO secret key
+
+    Returns:
+        pd.DataFrame: One row per image with metadata (same columns as extract_gps_coordinates)
+    """
+    logger = get_run_logger()
+
+    names = [obj.object_name for obj in minio_objects]
+    records = {}
+    try:
+        for record in find_gps_records(names, bucket_name, batch_size):
+            if record["capture_time"] is not None:
+                records[record["filename"]] = record
+    except Exception as e:
+        logger.warning(f"Could not load GPS records from the database: {e}")
+    logger.info(f"Loaded {len(records)} of {len(names)} image records from the database")
+
+    client = Minio(
+        endpoint=endpoint,
+        access_key=access_key,
+        secret_key=secret_key,
+        secure=False
+    )
+
+    def _load(name):
+        for key in (gps_meta_key(name), _legacy_meta_key(name)):
+            try:
+                response = client.get_object(bucket_name, key)
+            except S3Error as e:
+                if e.code == "NoSuchKey":
+                    continue
+                raise
+            try:
+                record = json.loads(response.read())
+            finally:
+                try:
+                    response.close()
+                    response.release_conn()
+                except Exception:
+                    pass
+            if record.get("filename") == name:
+                return record
+            logger.warning(f"Ignoring {key}: recorded for {record.get('filename')}, not {name}")
+        return None
+
+    pending = [name for name in names if name not in records]
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for name, record in zip(pending, pool.map(_load, pending)):
+            if record is not None:
+                records[name] = record
+
+    missing = len(names) - len(records)
+    if missing:
+        logger.warning(f"No ingest metadata found for {missing} of {len(names)} images")
+
+    logger.info(f"Loaded metadata for {len(records)} images")
+    return pd.DataFrame([records[name] for name in names if name in records])
+
+
+def split_into_flights(
+    metadata: pd.DataFrame,
+    max_time_gap_s: float = 300.0,
+    max_distance_m: float = 500.0,
+    min_images: int = 5,
+    max_images: int = 500,
+) -> Tuple[List[pd.DataFrame], List[str]]:
+    """
+    Split image metadata into flights; see group_images_into_flights.
+
+    Returns:
+        Tuple[List[pd.DataFrame], List[str]]: Rows per flight in capture order
+            (with `time` and `camera` columns), flights ordered by start time,
+            and the filenames left out
+    """
+    if metadata is None or metadata.empty:
+        return [], []
+
+    df = metadata.copy()
+    if "capture_time" not in df.columns:
+        df["capture_time"] = None
+    if "camera" not in df.columns:
+        df["camera"] = None
+
+    # Only EXIF (camera clock) time is comparable between images; upload
+    # times are on another clock, so images without it are left out
+    df["time"] = pd.to_datetime(df["capture_time"], errors="coerce")
+    untimed = df["time"].isna()
+    dropped = df.loc[untimed, "filename"].tolist()
+    df = df.loc[~untimed].copy()
+    if df.empty:
+        return [], dropped
+
+    # Partition by camera first so drones flying at the same time, whose
+    # images interleave in time, still form contiguous flights
+    df["camera"] = df["camera"].fillna("")
+    df = df.sort_values(["camera", "time", "filename"], kind="mergesort").reset_index(drop=True)
+
+    time_gap = df["time"].diff().dt.total_seconds()
+    distance = pd.Series(
+        _haversine_m(
+            df["latitude"].shift().to_numpy(dtype=float),
+            df["longitude"].shift().to_numpy(dtype=float),
+            df["latitude"].to_numpy(dtype=float),
+            df["longitude"].to_numpy(dtype=float),
+        ),
+        index=df.index,
+    )
+    camera_change = df["camera"] != df["camera"].shift()
+
+    breaks = (time_gap > max_time_gap_s) | (distance > max_distance_m) | camera_change
+    breaks.iloc[0] = True
+    df["flight"] = breaks.cumsum()
+
+    flights: List[pd.DataFrame] = []
+    for _, flight in df.groupby("flight", sort=True):
+        if len(flight) < min_images:
+            dropped.extend(flight["filename"])
+            continue
+        # Never split a flight into chunks smaller than min_images
+        n_chunks = max(1, min(-(-len(flight) // max_images), len(flight) // min_images))
+        for chunk in np.array_split(flight.index.to_numpy(), n_chunks):
+            flights.append(flight.loc[chunk].drop(columns="flight"))
+    flights.sort(key=lambda flight: (flight["time"].iloc[0], flight["camera"].iloc[0]))
+    return flights, dropped
+
+
+@task
+def group_images_into_flights(
+    metadata: pd.DataFrame,
+    max_time_gap_s: float = 300.0,
+    max_distance_m: float = 500.0,
+    min_images: int = 5,
+    max_images: int = 500,
+) -> List[List[str]]:
+    """
+    Split images into flights using capture time, position and camera.
+
+    Images are partitioned by camera and sorted by EXIF capture time, and a
+    new flight starts whenever consecutive images of a camera are more than
+    `max_time_gap_s` apart or more than `max_distance_m` apart. Flights larger
+    than `max_images` are split into consecutive, evenly sized chunks.
+    Flights smaller than `min_images` and images without a capture time are
+    left out. No image data is read.
+
+    Args:
+        metadata (pd.DataFrame): Output of load_image_metadata / extract_gps_coordinates
+        max_time_gap_s (float): Time gap in seconds that starts a new flight
+        max_distance_m (float): Distance jump in metres that starts a new flight
+        min_images (int): Smallest image set worth submitting to ODM
+        max_images (int): Largest image set submitted to ODM as one job
+
+    Returns:
+        List[List[str]]: Object names per flight, in capture order
+    """
+    logger = get_run_logger()
+
+    if metadata is None or metadata.empty:
+        logger.warning("No image metadata to group")
+        return []
+
+    flights, dropped = split_into_flights(
+        metadata,
+        max_time_gap_s=max_time_gap_s,
+        max_distance_m=max_distance_m,
+        min_images=min_images,
+        max_images=max_images,
+    )
+    if dropped:
+        logger.warning(
+            f"Left out {len(dropped)} images without an EXIF capture time "
+            f"or in flights smaller than {min_images}"
+        )
+
+    summary = [
+        {
+            "flight": index,
+            "images": len(flight),
+            "start": str(flight["time"].iloc[0]),
+            "end": str(flight["time"].iloc[-1]),
+            "camera": flight["camera"].iloc[0],
+        }
+        for index, flight in enumerate(flights, start=1)
+    ]
+    if summary:
+        create_table_artifact(
+            key="image-flights",
+            table=summary,
+            description=f"# Flights\nGrouped {sum(s['images'] for s in summary)} of {len(metadata)} images into {len(summary)} flights"
+        )
+
+    logger.info(f"Grouped {len(metadata)} images into {len(flights)} flights")
+    return [flight["filename"].tolist() for flight in flights]
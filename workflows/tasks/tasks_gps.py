@@ -9,6 +9,11 @@ import json
 import os
 import re
 import hashlib
+from datetime import datetime
+
+def gps_meta_key(object_name: str) -> str:
+    """Return the MinIO key of the GPS metadata document for an image object"""
+    return f"meta/{object_name.lstrip('/')}.gps.json"
 
 @task
 def extract_gps_coordinates(
@@ -16,7 +21,8 @@ def extract_gps_coordinates(
     bucket_name: str,
     endpoint: str = "localhost:9050", 
     access_key: str = "minioadmin",
-    secret_key: str = "minioadmin"
+    secret_key: str = "minioadmin",
+    raise_errors: bool = False
 ) -> pd.DataFrame:
     """
     Extract GPS coordinates from image metadata for a list of MinIO objects.
@@ -27,9 +33,11 @@ def extract_gps_coordinates(
         endpoint (str): MinIO server endpoint
         access_key (str): MinIO access key
         secret_key (str): MinIO secret key
+        raise_errors (bool): Re-raise MinIO read/write errors instead of skipping the object
+            (images without usable EXIF are still skipped)
         
     Returns:
-        pd.DataFrame: DataFrame containing filename, latitude and longitude
+        pd.DataFrame: DataFrame containing filename, latitude, longitude, capture time and camera model
     """
     logger = get_run_logger()
     logger.info(f"Extracting GPS coordinates from {len(minio_objects)} objects")
@@ -44,6 +52,7 @@ def extract_gps_coordinates(
 
     data = []
     for obj in minio_objects:
+        downloaded = False
         try:
             # Get object data from MinIO
             response = client.get_object(bucket_name, obj.object_name)
@@ -53,6 +62,7 @@ def extract_gps_coordinates(
                 response.release_conn()
             except Exception:
                 pass
+            downloaded = True
             
             # Extract EXIF data
             img = Image(img_bytes)
@@ -70,7 +80,9 @@ def extract_gps_coordinates(
                     'latitude': float(lat),
                     'longitude': float(lon),
                     'size': int(obj.size),
-                    'last_modified': last_modified_value
+                    'last_modified': last_modified_value,
+                    'capture_time': _capture_time(img),
+                    'camera': _camera_model(img)
                 })
                 logger.debug(f"Extracted coordinates from {obj.object_name}: ({lat}, {lon})")
             else:
@@ -78,24 +90,27 @@ def extract_gps_coordinates(
                 
         except Exception as e:
             logger.error(f"Error processing {obj.object_name}: {str(e)}")
+            if raise_errors and not downloaded:
+                raise
             continue
 
     df = pd.DataFrame(data)
     
     if not df.empty:
         logger.info(f"Successfully extracted coordinates from {len(df)} images")
-        # Save per-image GPS metadata to MinIO in meta/ directory
+        # Save per-image GPS metadata to MinIO under meta/<object key>
         for _, row in df.iterrows():
             try:
-                base_name = os.path.basename(str(row["filename"]))
-                json_key = f"meta/{base_name}.gps.json"
+                json_key = gps_meta_key(str(row["filename"]))
                 # Build a single-record JSON payload for this image
                 payload = {
                     "filename": row["filename"],
                     "latitude": float(row["latitude"]),
                     "longitude": float(row["longitude"]),
                     "size": int(row["size"]),
-                    "last_modified": str(row["last_modified"])
+                    "last_modified": str(row["last_modified"]),
+                    "capture_time": row["capture_time"],
+                    "camera": row["camera"]
                 }
                 buffer = BytesIO(json.dumps(payload).encode("utf-8"))
                 buffer.seek(0)
@@ -109,6 +124,8 @@ def extract_gps_coordinates(
                 logger.debug(f"Wrote GPS JSON to s3://{bucket_name}/{json_key}")
             except Exception as e:
                 logger.error(f"Failed to write GPS JSON for {row.get('filename')}: {e}")
+                if raise_errors:
+                    raise
         
         # Create table artifact to visualize the results
         from prefect.artifacts import create_table_artifact
@@ -143,3 +160,18 @@ def _convert_to_decimal(coords, ref):
     if ref in ['S', 'W']:
         decimal = -decimal
     return decimal
+
+def _capture_time(img):
+    """Return the EXIF capture time as an ISO string, or None if absent"""
+    value = img.get('datetime_original') or img.get('datetime')
+    if not value:
+        return None
+    try:
+        return datetime.strptime(str(value), "%Y:%m:%d %H:%M:%S").isoformat()
+    except ValueError:
+        return None
+
+def _camera_model(img):
+    """Return "<make> <model>" from EXIF, or None if absent"""
+    parts = [str(img.get(tag)).strip() for tag in ('make', 'model') if img.get(tag)]
+    return " ".join(parts) or None
@@ -0,0 +1,291 @@
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from prefect import task
+from prefect.logging import get_run_logger
+from minio import Minio
+from minio.datatypes import Object as MinioObject
+from minio.error import S3Error
+from collections import OrderedDict
+from datetime import datetime
+from io import BytesIO
+from urllib.parse import unquote_plus
+import json
+import queue
+import re
+import threading
+import time
+
+from tasks.tasks_previews import is_derived_object
+
+OBJECT_CREATED_EVENTS = ("s3:ObjectCreated:*",)
+CHECKPOINT_PREFIX = "meta/checkpoints"
+
+
+class NotificationStreamError(Exception):
+    """The bucket notification stream closed or failed; the listener should reconnect"""
+
+
+def checkpoint_key(prefix: str) -> str:
+    """Return the MinIO key holding the listener checkpoint for `prefix`"""
+    sanitized = re.sub(r"[^a-z0-9-]+", "-", prefix.lower()).strip("-") or "root"
+    return f"{CHECKPOINT_PREFIX}/ingest-listener-{sanitized}.json"
+
+
+def is_listener_source(object_name: str, prefix: str) -> bool:
+    """Return False for objects the listener writes itself (checkpoint, meta/, previews/)"""
+    return object_name != checkpoint_key(prefix) and not is_derived_object(object_name)
+
+
+def load_listener_checkpoint(client: Minio, bucket_name: str, prefix: str) -> Optional[datetime]:
+    """Return the last processed object timestamp, or None if no checkpoint exists"""
+    try:
+        response = client.get_object(bucket_name, checkpoint_key(prefix))
+    except S3Error as e:
+        if e.code == "NoSuchKey":
+            return None
+        raise
+    try:
+        payload = json.loads(response.read())
+    finally:
+        try:
+            response.close()
+            response.release_conn()
+        except Exception:
+            pass
+    return datetime.fromisoformat(payload["last_modified"])
+
+
+def save_listener_checkpoint(
+    client: Minio,
+    bucket_name: str,
+    prefix: str,
+    last_modified: datetime,
+) -> None:
+    """Persist the last processed object timestamp for `prefix`"""
+    payload = {"prefix": prefix, "last_modified": last_modified.isoformat()}
+    buffer = BytesIO(json.dumps(payload).encode("utf-8"))
+    client.put_object(
+        bucket_name=bucket_name,
+        object_name=checkpoint_key(prefix),
+        data=buffer,
+        length=buffer.getbuffer().nbytes,
+        content_type="application/json"
+    )
+
+
+@task
+def list_minio_objects_since(
+    bucket_name: str,
+    prefix: str,
+    since: datetime,
+    endpoint: str = "localhost:9050",
+    access_key: str = "minioadmin",
+    secret_key: str = "minioadmin",
+) -> List[MinioObject]:
+    """
+    List objects under `prefix` modified at or after `since`.
+
+    Used once when a listener (re)starts to pick up uploads it missed.
+    Objects written by the pipeline itself are left out.
+
+    Args:
+        bucket_name (str): The name of the bucket to list objects from
+        prefix (str): The prefix to filter objects
+        since (datetime): Checkpoint timestamp of the last processed object
+        endpoint (str): MinIO server endpoint
+        access_key (str): Access key (user ID) for MinIO
+        secret_key (str): Secret key (password) for MinIO
+
+    Returns:
+        List[MinioObject]: Objects modified since the checkpoint, oldest first
+    """
+    logger = get_run_logger()
+
+    client = Minio(
+        endpoint=endpoint,
+        access_key=access_key,
+        secret_key=secret_key,
+        secure=False
+    )
+
+    missed = [
+        obj
+        for obj in client.list_objects(bucket_name, prefix=prefix, recursive=True)
+        if not obj.is_dir
+        and obj.last_modified is not None
+        and obj.last_modified >= since
+        and is_listener_source(obj.object_name, prefix)
+    ]
+    # Oldest first so the checkpoint only advances past fully processed objects
+    missed.sort(key=lambda obj: obj.last_modified)
+    logger.info(f"Found {len(missed)} objects in {bucket_name}/{prefix} since {since.isoformat()}")
+    return missed
+
+
+def _record_keys(event: dict) -> List[str]:
+    keys = []
+    for record in event.get("Records") or []:
+        key = record.get("s3", {}).get("object", {}).get("key")
+        if key:
+            keys.append(unquote_plus(key))
+    return keys
+
+
+def start_object_created_listener(
+    client: Minio,
+    bucket_name: str,
+    prefix: str,
+) -> "queue.Queue":
+    """
+    Start listening for s3:ObjectCreated:* events under `prefix`.
+
+    Events are read on a daemon thread and pushed to the returned queue as
+    MinioObject instances. Each key is stat'ed so `last_modified` is the
+    object's Last-Modified, the same clock list_minio_objects_since filters
+    on, rather than the event time. Objects the pipeline writes itself and
+    objects deleted before the stat are skipped. When the notification
+    stream closes or fails, a NotificationStreamError is pushed and the
+    thread exits; the consumer is expected to start a new listener.
+    """
+    events: "queue.Queue" = queue.Queue()
+
+    def _listen():
+        try:
+            with client.listen_bucket_notification(
+                bucket_name,
+                prefix=prefix,
+                events=OBJECT_CREATED_EVENTS,
+            ) as notifications:
+                for event in notifications:
+                    for key in _record_keys(event):
+                        if not is_listener_source(key, prefix):
+                            continue
+                        try:
+                            events.put(client.stat_object(bucket_name, key))
+                        except S3Error as e:
+                            if e.code != "NoSuchKey":
+                                raise
+            events.put(NotificationStreamError(f"Notification stream for '{bucket_name}' closed"))
+        except Exception as e:
+            events.put(NotificationStreamError(f"Notification stream for '{bucket_name}' failed: {e}"))
+
+    threading.Thread(target=_listen, name=f"minio-listen-{bucket_name}", daemon=True).start()
+    return events
+
+
+def batch_object_events(
+    events: "queue.Queue",
+    max_batch_size: int = 500,
+    max_batch_wait: float = 5.0,
+) -> Iterator[List[MinioObject]]:
+    """
+    Group queued objects into micro-batches.
+
+    A batch is emitted once it holds `max_batch_size` objects or
+    `max_batch_wait` seconds after its first object arrived, whichever
+    comes first. Blocks while the queue is idle.
+
+    An exception found in the queue is raised after the objects already
+    collected for the current batch have been yielded.
+    """
+    while True:
+        item = events.get()
+        if isinstance(item, Exception):
+            raise item
+
+        batch = [item]
+        error: Optional[Exception] = None
+        deadline = time.monotonic() + max_batch_wait
+        while len(batch) < max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = events.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if isinstance(item, Exception):
+                error = item
+                break
+            batch.append(item)
+
+        yield batch
+        if error is not None:
+            raise error
+
+
+class ListenerState:
+    """
+    Dedup window, unresolved failures and checkpoint of an ingest listener.
+
+    Failed objects are kept until a later attempt succeeds and are retried
+    with every batch. The checkpoint never moves past the oldest of them,
+    so a restarted listener's catch-up still lists them.
+    """
+
+    def __init__(self, checkpoint: Optional[datetime] = None, dedup_window: int = 100_000):
+        self.checkpoint = checkpoint
+        self.dedup_window = dedup_window
+        self.recent: "OrderedDict[Tuple[str, str], None]" = OrderedDict()
+        self.failed: Dict[str, MinioObject] = {}
+        self.newest_done: Optional[datetime] = None
+
+    @staticmethod
+    def _marker(obj: MinioObject) -> Tuple[str, str]:
+        return obj.object_name, (obj.etag or "").strip('"')
+
+    def process(
+        self,
+        objects: List[MinioObject],
+        ingest: Callable[[List[MinioObject]], List[str]],
+    ) -> bool:
+        """
+        Ingest new objects plus unresolved failures and update the checkpoint.
+
+        Args:
+            objects (List[MinioObject]): Objects from a notification batch or catch-up listing
+            ingest (Callable): Ingests a batch and returns the names of objects that failed
+
+        Returns:
+            bool: True if the checkpoint advanced and should be saved
+        """
+        fresh = []
+        for obj in objects:
+            marker = self._marker(obj)
+            if marker in self.recent:
+                continue
+            self.recent[marker] = None
+            if len(self.recent) > self.dedup_window:
+                self.recent.popitem(last=False)
+            fresh.append(obj)
+
+        names = {obj.object_name for obj in fresh}
+        batch = fresh + [obj for name, obj in self.failed.items() if name not in names]
+        if not batch:
+            return False
+
+        failed = set(ingest(batch))
+        for obj in batch:
+            if obj.object_name in failed:
+                self.failed[obj.object_name] = obj
+                # Let a repeated event for the same version through as well
+                self.recent.pop(self._marker(obj), None)
+                continue
+            self.failed.pop(obj.object_name, None)
+            if obj.last_modified is not None and (
+                self.newest_done is None or obj.last_modified > self.newest_done
+            ):
+                self.newest_done = obj.last_modified
+
+        # Catch-up lists objects at or after the checkpoint, so stopping at
+        # the oldest failure keeps it in the next listing
+        candidate = self.newest_done
+        oldest_failure = min(
+            (obj.last_modified for obj in self.failed.values() if obj.last_modified is not None),
+            default=None,
+        )
+        if candidate is not None and oldest_failure is not None:
+            candidate = min(candidate, oldest_failure)
+        if candidate is not None and (self.checkpoint is None or candidate > self.checkpoint):
+            self.checkpoint = candidate
+            return True
+        return False
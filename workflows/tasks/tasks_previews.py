@@ -0,0 +1,209 @@
+from typing import Dict, List, Optional, Tuple
+from prefect import task
+from prefect.logging import get_run_logger
+from minio import Minio
+from minio.datatypes import Object as MinioObject
+from minio.error import S3Error
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from exif import Image as ExifImage
+from PIL import ExifTags, Image, ImageOps
+from io import BytesIO
+import posixpath
+
+PREVIEW_PREFIX = "previews"
+# The smallest size is covered by the standard EXIF thumbnail (~160x120)
+DEFAULT_PREVIEW_SIZES = (128, 1024)
+
+# APP1 (EXIF) is capped at 64 KiB and sits at the start of a JPEG
+EXIF_HEADER_BYTES = 64 * 1024
+# Largest edge of a standard EXIF thumbnail; above this the header read is skipped
+EXIF_THUMBNAIL_MAX = 160
+
+# Derived objects written back into the bucket, never used as preview sources
+DERIVED_PREFIXES = (f"{PREVIEW_PREFIX}/", "meta/")
+
+PREVIEW_EXTENSIONS = ('.jpg', '.jpeg')
+
+
+def preview_key(object_name: str, size: int) -> str:
+    """Return the MinIO key of the `size` px preview for `object_name`"""
+    stem, _ = posixpath.splitext(object_name.lstrip("/"))
+    return f"{PREVIEW_PREFIX}/{size}/{stem}.jpg"
+
+
+def is_derived_object(object_name: str) -> bool:
+    """Return True for previews and metadata written by the ingest pipeline"""
+    return object_name.lstrip("/").startswith(DERIVED_PREFIXES)
+
+
+def _object_exists(client: Minio, bucket_name: str, object_name: str) -> bool:
+    try:
+        client.stat_object(bucket_name, object_name)
+        return True
+    except S3Error as e:
+        if e.code in ("NoSuchKey", "NoSuchObject"):
+            return False
+        raise
+
+
+def _read_object(client: Minio, bucket_name: str, object_name: str, **kwargs) -> bytes:
+    response = client.get_object(bucket_name, object_name, **kwargs)
+    try:
+        return response.read()
+    finally:
+        try:
+            response.close()
+            response.release_conn()
+        except Exception:
+            pass
+
+
+def _exif_thumbnail(header: bytes) -> Optional[Image.Image]:
+    """Decode the embedded EXIF thumbnail from the leading bytes of a JPEG, if any"""
+    try:
+        exif_img = ExifImage(header)
+        if not exif_img.has_exif:
+            return None
+        thumb = Image.open(BytesIO(exif_img.get_thumbnail()))
+        thumb.load()
+        # The thumbnail is stored unrotated like the main image, and carries
+        # no EXIF of its own, so apply the main image's orientation
+        orientation = int(exif_img.get("orientation", 1))
+    except Exception:
+        return None
+    thumb.getexif()[ExifTags.Base.Orientation] = orientation
+    return ImageOps.exif_transpose(thumb)
+
+
+def _draft_decode(data: bytes, size: int) -> Image.Image:
+    """Decode a JPEG at the smallest DCT scale that still covers `size` px, upright"""
+    img = Image.open(BytesIO(data))
+    img.draft("RGB", (size, size))
+    img.load()
+    return ImageOps.exif_transpose(img)
+
+
+def _encode_jpeg(img: Image.Image, size: int, quality: int) -> bytes:
+    preview = img.convert("RGB")
+    preview.thumbnail((size, size), Image.Resampling.LANCZOS)
+    buffer = BytesIO()
+    preview.save(buffer, format="JPEG", quality=quality, optimize=True)
+    return buffer.getvalue()
+
+
+def _build_previews(
+    client: Minio,
+    bucket_name: str,
+    object_name: str,
+    sizes: List[int],
+    quality: int,
+) -> List[str]:
+    """Generate and upload the preview sizes missing for a single image"""
+    sizes = [s for s in sizes if not _object_exists(client, bucket_name, preview_key(object_name, s))]
+    if not sizes:
+        return []
+
+    thumb = None
+    if min(sizes) <= EXIF_THUMBNAIL_MAX:
+        header = _read_object(client, bucket_name, object_name, offset=0, length=EXIF_HEADER_BYTES)
+        thumb = _exif_thumbnail(header)
+
+    decoded: Optional[Image.Image] = None
+    written: List[str] = []
+    # Largest first so the draft decode is done once and reused for smaller sizes
+    for size in sorted(sizes, reverse=True):
+        if thumb is not None and max(thumb.size) >= size:
+            source = thumb
+        else:
+            if decoded is None:
+                decoded = _draft_decode(
+                    _read_object(client, bucket_name, object_name), size
+                )
+            source = decoded
+
+        data = _encode_jpeg(source, size, quality)
+        key = preview_key(object_name, size)
+        client.put_object(
+            bucket_name=bucket_name,
+            object_name=key,
+            data=BytesIO(data),
+            length=len(data),
+            content_type="image/jpeg",
+        )
+        written.append(key)
+    return written
+
+
+@task
+def generate_image_previews(
+    minio_objects: List[MinioObject],
+    bucket_name: str,
+    sizes: Tuple[int, ...] = DEFAULT_PREVIEW_SIZES,
+    quality: int = 80,
+    max_workers: int = 8,
+    endpoint: str = "localhost:9050",
+    access_key: str = "minioadmin",
+    secret_key: str = "minioadmin"
+) -> Dict[str, Optional[List[str]]]:
+    """
+    Generate a small pyramid of downscaled JPEG previews for ingested images.
+
+    The embedded EXIF thumbnail is used for any size it can cover; larger
+    sizes fall back to a JPEG draft-mode decode of the original. Sizes that
+    already exist under `previews/` are skipped, and previews or metadata
+    objects are never used as sources.
+
+    Args:
+        minio_objects (List[MinioObject]): List of MinIO objects containing image files
+        bucket_name (str): Name of the MinIO bucket
+        sizes (Tuple[int, ...]): Longest-edge pixel sizes to generate
+        quality (int): JPEG quality of the previews
+        max_workers (int): Number of images processed in parallel
+        endpoint (str): MinIO server endpoint
+        access_key (str): MinIO access key
+        secret_key (str): MinIO secret key
+
+    Returns:
+        Dict[str, Optional[List[str]]]: Preview keys written per source object (None if it failed)
+    """
+    logger = get_run_logger()
+
+    client = Minio(
+        endpoint=endpoint,
+        access_key=access_key,
+        secret_key=secret_key,
+        secure=False
+    )
+
+    # Existing previews are checked per key in the workers, so the cost
+    # scales with the batch rather than with the whole preview set
+    pending = [
+        obj.object_name
+        for obj in minio_objects
+        if obj.object_name.lower().endswith(PREVIEW_EXTENSIONS)
+        and not is_derived_object(obj.object_name)
+    ]
+
+    logger.info(
+        f"Generating previews for {len(pending)} images "
+        f"({len(minio_objects) - len(pending)} not eligible)"
+    )
+
+    results: Dict[str, Optional[List[str]]] = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            pool.submit(_build_previews, client, bucket_name, name, list(sizes), quality): name
+            for name in pending
+        }
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                results[name] = future.result()
+                logger.debug(f"Wrote previews for {name}: {results[name]}")
+            except Exception as e:
+                results[name] = None
+                logger.error(f"Failed to generate previews for {name}: {e}")
+
+    failed = sum(1 for keys in results.values() if keys is None)
+    logger.info(f"Generated previews for {len(results) - failed} images ({failed} failed)")
+    return results
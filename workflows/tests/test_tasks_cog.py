@@ -0,0 +1,127 @@
+import numpy as np
+import pytest
+import rasterio
+from prefect.logging import disable_run_logger
+from rasterio.transform import from_origin
+
+import tasks.tasks_cog as tasks_cog
+from tasks.tasks_cog import _read_window, convert_rasters_to_cog, is_cog
+
+SIZE = 1024
+# 1 m pixels with the top-left corner at (500000, 4001024)
+TRANSFORM = from_origin(500_000, 4_000_000 + SIZE, 1, 1)
+
+
+def _geotiff(path, size=SIZE):
+    data = np.arange(size * size, dtype=np.uint16).reshape(1, size, size) % 4096
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with rasterio.open(
+        path, "w", driver="GTiff", width=size, height=size, count=1,
+        dtype="uint16", crs="EPSG:32613", transform=TRANSFORM,
+    ) as dst:
+        dst.write(data)
+    return data
+
+
+@pytest.fixture
+def odm_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(tasks_cog, "create_table_artifact", lambda **kwargs: None)
+    _geotiff(tmp_path / "odm_orthophoto" / "odm_orthophoto.tif")
+    _geotiff(tmp_path / "odm_orthophoto" / "odm_orthophoto.original.tif")
+    _geotiff(tmp_path / "odm_dem" / "dsm.tif")
+    return tmp_path
+
+
+def test_converts_canonical_rasters_in_place(odm_dir):
+    expected = _geotiff(odm_dir / "odm_dem" / "dtm.tif")
+
+    with disable_run_logger():
+        converted = convert_rasters_to_cog.fn(str(odm_dir), blocksize=256)
+
+    assert sorted(converted) == sorted(str(odm_dir / p) for p in (
+        "odm_orthophoto/odm_orthophoto.tif", "odm_dem/dsm.tif", "odm_dem/dtm.tif",
+    ))
+    assert not is_cog(odm_dir / "odm_orthophoto" / "odm_orthophoto.original.tif")
+    assert not list(odm_dir.rglob(f"*{tasks_cog.COG_TMP_SUFFIX}"))
+    with rasterio.open(odm_dir / "odm_dem" / "dtm.tif") as src:
+        assert is_cog(odm_dir / "odm_dem" / "dtm.tif")
+        assert src.block_shapes[0] == (256, 256)
+        assert src.overviews(1) == [2, 4]
+        assert src.transform == TRANSFORM
+        assert np.array_equal(src.read(), expected)
+
+
+def test_existing_cogs_are_not_rewritten(odm_dir):
+    path = odm_dir / "odm_dem" / "dsm.tif"
+    with disable_run_logger():
+        convert_rasters_to_cog.fn(str(odm_dir), blocksize=256)
+        mtime = path.stat().st_mtime_ns
+        convert_rasters_to_cog.fn(str(odm_dir), blocksize=256)
+
+    assert path.stat().st_mtime_ns == mtime
+
+
+def test_failed_conversion_keeps_original(odm_dir):
+    broken = odm_dir / "odm_dem" / "dtm.tif"
+    broken.write_bytes(b"not a tiff")
+
+    with disable_run_logger():
+        converted = convert_rasters_to_cog.fn(str(odm_dir), blocksize=256)
+
+    assert str(broken) not in converted
+    assert broken.read_bytes() == b"not a tiff"
+    assert is_cog(odm_dir / "odm_dem" / "dsm.tif")
+    assert not list(odm_dir.rglob(f"*{tasks_cog.COG_TMP_SUFFIX}"))
+
+
+@pytest.fixture
+def cog(odm_dir):
+    with disable_run_logger():
+        convert_rasters_to_cog.fn(str(odm_dir), blocksize=256)
+    with rasterio.open(odm_dir / "odm_dem" / "dsm.tif") as src:
+        yield src
+
+
+def test_reads_bbox_at_full_resolution(cog):
+    # Columns 100..299, rows 24..123 of the raster
+    bbox = (500_100, 4_000_900, 500_300, 4_001_000)
+
+    result = _read_window(cog, bbox, zoom=0)
+
+    assert result["data"].shape == (1, 100, 200)
+    assert np.array_equal(result["data"], cog.read(window=((24, 124), (100, 300))))
+    assert result["transform"] == from_origin(500_100, 4_001_000, 1, 1)
+    assert result["zoom"] == 0
+
+
+def test_zoom_halves_resolution_and_scales_transform(cog):
+    bbox = (500_000, 4_000_512, 500_512, 4_001_024)
+
+    result = _read_window(cog, bbox, zoom=1)
+
+    assert result["data"].shape == (1, 256, 256)
+    assert result["transform"] == from_origin(500_000, 4_001_024, 2, 2)
+
+
+def test_zoom_is_clamped_to_available_overviews(cog):
+    bbox = (500_000, 4_000_000, 500_000 + SIZE, 4_000_000 + SIZE)
+
+    result = _read_window(cog, bbox, zoom=10)
+
+    assert result["zoom"] == 2
+    assert result["data"].shape == (1, 256, 256)
+    assert result["transform"] == from_origin(500_000, 4_001_024, 4, 4)
+
+
+def test_bbox_is_clipped_to_raster(cog):
+    bbox = (499_000, 4_000_000, 500_010, 4_000_010)
+
+    result = _read_window(cog, bbox, zoom=0)
+
+    assert result["data"].shape == (1, 10, 10)
+    assert result["transform"] == from_origin(500_000, 4_000_010, 1, 1)
+
+
+def test_bbox_outside_raster_raises(cog):
+    with pytest.raises(ValueError):
+        _read_window(cog, (400_000, 3_000_000, 400_100, 3_000_100), zoom=0)
@@ -0,0 +1,51 @@
+from tasks.tasks_db import group_keys_by_product
+
+PRODUCTS = ["odm_dem", "odm_orthophoto", "log.json", "task_output.txt"]
+
+
+def test_groups_directory_and_file_products():
+    keys = [
+        "odm_results/site-1/odm_dem/dsm.tif",
+        "odm_results/site-1/odm_dem/dtm.tif",
+        "odm_results/site-1/odm_orthophoto/odm_orthophoto.cog.tif",
+        "odm_results/site-1/log.json",
+        "odm_results/site-1/task_output.txt",
+    ]
+
+    grouped = group_keys_by_product(keys, "odm_results/site-1", PRODUCTS)
+
+    assert grouped == {
+        "odm_dem": keys[0:2],
+        "odm_orthophoto": [keys[2]],
+        "log.json": [keys[3]],
+        "task_output.txt": [keys[4]],
+    }
+
+
+def test_ignores_unknown_products_and_other_prefixes():
+    keys = [
+        "odm_results/site-1/odm_filterpoints/points.ply",
+        "odm_results/site-2/odm_dem/dsm.tif",
+        "odm_results/site-1x/odm_dem/dsm.tif",
+        "odm_results/site-1/nested/log.json",
+    ]
+
+    assert group_keys_by_product(keys, "odm_results/site-1", PRODUCTS) == {}
+
+
+def test_file_product_names_do_not_match_directories():
+    keys = [
+        "run/log.json/extra.txt",
+        "run/odm_dem",
+    ]
+
+    assert group_keys_by_product(keys, "/run/", PRODUCTS) == {}
+
+
+def test_empty_prefix():
+    keys = ["odm_dem/dsm.tif", "log.json"]
+
+    assert group_keys_by_product(keys, "", PRODUCTS) == {
+        "odm_dem": ["odm_dem/dsm.tif"],
+        "log.json": ["log.json"],
+    }
@@ -0,0 +1,159 @@
+import json
+
+import pandas as pd
+from minio.datatypes import Object as MinioObject
+from minio.error import S3Error
+from prefect.logging import disable_run_logger
+
+import tasks.tasks_flights as tasks_flights
+from tasks.tasks_flights import load_image_metadata, split_into_flights
+
+START = pd.Timestamp("2025-01-01T10:00:00")
+
+
+def _images(prefix, count, start_s=0, step_s=2, lat=40.0, camera="DJI FC6310"):
+    return [
+        {
+            "filename": f"{prefix}{i:03d}.jpg",
+            "latitude": lat + i * 1e-4,
+            "longitude": -105.0,
+            "last_modified": "2025-01-02T00:00:00+00:00",
+            "capture_time": (START + pd.Timedelta(seconds=start_s + i * step_s)).isoformat(),
+            "camera": camera,
+        }
+        for i in range(count)
+    ]
+
+
+def _names(flights):
+    return [flight["filename"].tolist() for flight in flights]
+
+
+def test_single_flight_in_capture_order():
+    rows = _images("a", 8)[::-1]
+
+    flights, dropped = split_into_flights(pd.DataFrame(rows))
+
+    assert _names(flights) == [[f"a{i:03d}.jpg" for i in range(8)]]
+    assert dropped == []
+
+
+def test_splits_on_time_gap():
+    rows = _images("a", 6) + _images("b", 6, start_s=1200)
+
+    flights, _ = split_into_flights(pd.DataFrame(rows), max_time_gap_s=300)
+
+    assert [len(f) for f in flights] == [6, 6]
+    assert flights[1]["filename"].iloc[0] == "b000.jpg"
+
+
+def test_splits_on_distance_jump():
+    # Second site starts right after the first, about 11 km north
+    rows = _images("a", 6) + _images("b", 6, start_s=14, lat=40.1)
+
+    flights, _ = split_into_flights(pd.DataFrame(rows), max_distance_m=500)
+
+    assert _names(flights)[1][0] == "b000.jpg"
+    assert [len(f) for f in flights] == [6, 6]
+
+
+def test_splits_on_camera_change():
+    rows = _images("a", 6) + _images("b", 6, start_s=14, camera="Parrot Sequoia")
+
+    flights, _ = split_into_flights(pd.DataFrame(rows))
+
+    assert [f["camera"].iloc[0] for f in flights] == ["DJI FC6310", "Parrot Sequoia"]
+
+
+def test_interleaved_cameras_form_separate_flights():
+    # Two drones flying at the same time, shots offset by 1 s
+    rows = _images("a", 50) + _images("b", 50, start_s=1, camera="Parrot Sequoia")
+
+    flights, dropped = split_into_flights(pd.DataFrame(rows), max_images=500)
+
+    assert [len(f) for f in flights] == [50, 50]
+    assert [f["camera"].iloc[0] for f in flights] == ["DJI FC6310", "Parrot Sequoia"]
+    assert dropped == []
+
+
+def test_drops_small_flights():
+    rows = _images("a", 6) + _images("b", 3, start_s=1200)
+
+    flights, dropped = split_into_flights(pd.DataFrame(rows), min_images=5)
+
+    assert [len(f) for f in flights] == [6]
+    assert sorted(dropped) == ["b000.jpg", "b001.jpg", "b002.jpg"]
+
+
+def test_drops_images_without_capture_time():
+    rows = _images("a", 6)
+    rows[2]["capture_time"] = None
+
+    flights, dropped = split_into_flights(pd.DataFrame(rows))
+
+    # The untimed image does not break the flight and is reported
+    assert [len(f) for f in flights] == [5]
+    assert dropped == ["a002.jpg"]
+
+
+def test_chunks_large_flights_evenly():
+    rows = _images("a", 23)
+
+    flights, _ = split_into_flights(pd.DataFrame(rows), min_images=5, max_images=10)
+
+    assert [len(f) for f in flights] == [8, 8, 7]
+    assert sum(_names(flights), []) == [f"a{i:03d}.jpg" for i in range(23)]
+
+
+def test_chunks_never_below_min_images():
+    rows = _images("a", 12)
+
+    flights, _ = split_into_flights(pd.DataFrame(rows), min_images=5, max_images=4)
+
+    assert [len(f) for f in flights] == [6, 6]
+
+
+def test_empty_metadata():
+    assert split_into_flights(pd.DataFrame()) == ([], [])
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+    def read(self):
+        return self.data
+
+    def close(self):
+        pass
+
+    def release_conn(self):
+        pass
+
+
+class FakeMinio:
+    def __init__(self, documents):
+        self.documents = {key: json.dumps(doc).encode() for key, doc in documents.items()}
+
+    def get_object(self, bucket_name, object_name):
+        if object_name not in self.documents:
+            raise S3Error("NoSuchKey", "missing", object_name, None, None, None)
+        return FakeResponse(self.documents[object_name])
+
+
+def test_load_metadata_prefers_db_then_meta_documents(monkeypatch):
+    a, b, c, d = _images("site-1/DJI_", 4)
+    other_d = {**d, "filename": "site-2/DJI_003.jpg"}
+    monkeypatch.setattr(tasks_flights, "find_gps_records", lambda paths, bucket, size: [a])
+    monkeypatch.setattr(tasks_flights, "Minio", lambda **kwargs: FakeMinio({
+        "meta/site-1/DJI_001.jpg.gps.json": b,
+        # Earlier ingests keyed documents by basename only
+        "meta/DJI_002.jpg.gps.json": c,
+        "meta/DJI_003.jpg.gps.json": other_d,
+    }))
+    objects = [MinioObject("hydra-data", row["filename"]) for row in (a, b, c, d)]
+
+    with disable_run_logger():
+        metadata = load_image_metadata.fn(objects, "hydra-data")
+
+    assert metadata["filename"].tolist() == ["site-1/DJI_000.jpg", "site-1/DJI_001.jpg", "site-1/DJI_002.jpg"]
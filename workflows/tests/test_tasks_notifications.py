@@ -0,0 +1,118 @@
+import queue
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from minio.datatypes import Object as MinioObject
+
+from tasks.tasks_notifications import (
+    ListenerState,
+    NotificationStreamError,
+    batch_object_events,
+    checkpoint_key,
+    is_listener_source,
+)
+
+START = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def _queue(*items):
+    events = queue.Queue()
+    for item in items:
+        events.put(item)
+    return events
+
+
+def test_flushes_when_batch_is_full():
+    batches = batch_object_events(_queue(*range(5)), max_batch_size=2, max_batch_wait=10)
+
+    assert [next(batches) for _ in range(2)] == [[0, 1], [2, 3]]
+
+
+def test_flushes_when_window_expires():
+    batches = batch_object_events(_queue(1, 2, 3), max_batch_size=10, max_batch_wait=0.05)
+
+    assert next(batches) == [1, 2, 3]
+
+
+def test_flushes_pending_batch_before_stream_error():
+    error = NotificationStreamError("closed")
+    batches = batch_object_events(_queue(1, 2, error, 3), max_batch_size=10, max_batch_wait=10)
+
+    assert next(batches) == [1, 2]
+    with pytest.raises(NotificationStreamError):
+        next(batches)
+
+
+def test_raises_stream_error_without_pending_batch():
+    batches = batch_object_events(_queue(NotificationStreamError("closed")))
+
+    with pytest.raises(NotificationStreamError):
+        next(batches)
+
+
+def _obj(name, minute, etag=None):
+    return MinioObject(
+        "hydra-data", name, last_modified=START + timedelta(minutes=minute), etag=etag or name
+    )
+
+
+class FakeIngest:
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.calls = []
+
+    def __call__(self, objects):
+        self.calls.append([obj.object_name for obj in objects])
+        return [obj.object_name for obj in objects if obj.object_name in self.failing]
+
+
+def test_checkpoint_holds_at_failure_across_later_batches():
+    state = ListenerState()
+    ingest = FakeIngest(failing={"ingest/b.jpg"})
+
+    assert state.process([_obj("ingest/a.jpg", 1), _obj("ingest/b.jpg", 2)], ingest)
+    assert state.checkpoint == START + timedelta(minutes=1)
+
+    # A newer batch succeeds while b still fails: b is retried and the
+    # checkpoint stops at b, which catch-up (>= checkpoint) still lists
+    state.process([_obj("ingest/c.jpg", 3)], ingest)
+    assert ingest.calls[-1] == ["ingest/c.jpg", "ingest/b.jpg"]
+    assert state.checkpoint == START + timedelta(minutes=2)
+
+    # Once the retry succeeds the checkpoint moves to the newest done object
+    ingest.failing.clear()
+    assert state.process([_obj("ingest/d.jpg", 4)], ingest)
+    assert ingest.calls[-1] == ["ingest/d.jpg", "ingest/b.jpg"]
+    assert state.checkpoint == START + timedelta(minutes=4)
+    assert state.failed == {}
+
+
+def test_checkpoint_stops_at_oldest_failure_when_everything_before_is_done():
+    state = ListenerState()
+    ingest = FakeIngest(failing={"ingest/a.jpg"})
+
+    assert not state.process([_obj("ingest/a.jpg", 1)], ingest)
+    assert state.process([_obj("ingest/b.jpg", 2), _obj("ingest/c.jpg", 3)], ingest)
+
+    # Catch-up lists objects at or after the checkpoint, so a is still included
+    assert state.checkpoint == START + timedelta(minutes=1)
+
+
+def test_repeated_events_are_dropped_but_failed_ones_are_not():
+    state = ListenerState()
+    ingest = FakeIngest(failing={"ingest/b.jpg"})
+
+    state.process([_obj("ingest/a.jpg", 1), _obj("ingest/b.jpg", 2)], ingest)
+    ingest.failing.clear()
+    state.process([_obj("ingest/a.jpg", 1), _obj("ingest/b.jpg", 2)], ingest)
+
+    assert ingest.calls[-1] == ["ingest/b.jpg"]
+    assert not state.process([_obj("ingest/a.jpg", 1)], ingest)
+    assert len(ingest.calls) == 2
+
+
+def test_listener_ignores_objects_it_writes():
+    assert is_listener_source("ingest/a.jpg", "ingest/")
+    assert not is_listener_source(checkpoint_key(""), "")
+    assert not is_listener_source("meta/ingest/a.jpg.gps.json", "")
+    assert not is_listener_source("previews/128/ingest/a.jpg", "")
@@ -0,0 +1,150 @@
+import struct
+from io import BytesIO
+
+from minio.datatypes import Object as MinioObject
+from minio.error import S3Error
+from PIL import Image
+from prefect.logging import disable_run_logger
+
+import tasks.tasks_previews as tasks_previews
+from tasks.tasks_previews import _build_previews, generate_image_previews, preview_key
+
+BUCKET = "hydra-data"
+BLUE = (0, 0, 255)
+RED = (255, 0, 0)
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+    def read(self):
+        return self.data
+
+    def close(self):
+        pass
+
+    def release_conn(self):
+        pass
+
+
+class FakeMinio:
+    """In-memory stand-in for the few Minio calls the preview task makes"""
+
+    def __init__(self, objects):
+        self.objects = dict(objects)
+        self.reads = []
+
+    def _missing(self, object_name):
+        return S3Error("NoSuchKey", "missing", object_name, None, None, None, BUCKET, object_name)
+
+    def stat_object(self, bucket_name, object_name):
+        if object_name not in self.objects:
+            raise self._missing(object_name)
+        return object()
+
+    def get_object(self, bucket_name, object_name, offset=0, length=0):
+        if object_name not in self.objects:
+            raise self._missing(object_name)
+        self.reads.append((object_name, length))
+        data = self.objects[object_name][offset:]
+        return FakeResponse(data[:length] if length else data)
+
+    def put_object(self, bucket_name, object_name, data, length, content_type=None):
+        self.objects[object_name] = data.read()
+
+
+def _jpeg(size, color, exif=b""):
+    buffer = BytesIO()
+    Image.new("RGB", size, color).save(buffer, format="JPEG", exif=exif)
+    return buffer.getvalue()
+
+
+def _exif(orientation=1, thumbnail=None):
+    """APP1 payload with an orientation tag and an optional IFD1 JPEG thumbnail"""
+    ifd0 = struct.pack("<HHHIHHI", 1, 0x0112, 3, 1, orientation, 0, 26 if thumbnail else 0)
+    tiff = b"II*\x00" + struct.pack("<I", 8) + ifd0
+    if thumbnail:
+        ifd1 = struct.pack("<HHHIIHHIII", 2, 0x0201, 4, 1, 56, 0x0202, 4, 1, len(thumbnail), 0)
+        tiff += ifd1 + thumbnail
+    return b"Exif\x00\x00" + tiff
+
+
+def _preview(client, name, size):
+    return Image.open(BytesIO(client.objects[preview_key(name, size)]))
+
+
+def test_skips_sizes_whose_preview_exists():
+    existing = _jpeg((128, 96), RED)
+    client = FakeMinio({
+        "ingest/a.jpg": _jpeg((2000, 1500), BLUE),
+        preview_key("ingest/a.jpg", 128): existing,
+    })
+
+    written = _build_previews(client, BUCKET, "ingest/a.jpg", [128, 1024], 80)
+
+    assert written == [preview_key("ingest/a.jpg", 1024)]
+    assert client.objects[preview_key("ingest/a.jpg", 128)] == existing
+    assert _preview(client, "ingest/a.jpg", 1024).size == (1024, 768)
+
+
+def test_writes_nothing_when_all_previews_exist():
+    client = FakeMinio({
+        "ingest/a.jpg": _jpeg((2000, 1500), BLUE),
+        preview_key("ingest/a.jpg", 128): b"",
+        preview_key("ingest/a.jpg", 1024): b"",
+    })
+
+    assert _build_previews(client, BUCKET, "ingest/a.jpg", [128, 1024], 80) == []
+    assert client.reads == []
+
+
+def test_exif_thumbnail_is_used_only_for_sizes_it_covers():
+    thumbnail = _jpeg((160, 120), RED)
+    client = FakeMinio({"ingest/a.jpg": _jpeg((2000, 1500), BLUE, _exif(thumbnail=thumbnail))})
+
+    _build_previews(client, BUCKET, "ingest/a.jpg", [128, 1024], 80)
+
+    small = _preview(client, "ingest/a.jpg", 128).convert("RGB")
+    large = _preview(client, "ingest/a.jpg", 1024).convert("RGB")
+    assert small.getpixel((10, 10))[0] > 200
+    assert large.getpixel((10, 10))[2] > 200
+
+
+def test_header_is_not_read_when_sizes_exceed_thumbnail():
+    thumbnail = _jpeg((160, 120), RED)
+    client = FakeMinio({"ingest/a.jpg": _jpeg((2000, 1500), BLUE, _exif(thumbnail=thumbnail))})
+
+    _build_previews(client, BUCKET, "ingest/a.jpg", [512, 1024], 80)
+
+    assert client.reads == [("ingest/a.jpg", 0)]
+
+
+def test_previews_follow_exif_orientation():
+    # Orientation 6: stored landscape, displayed rotated 90 degrees clockwise
+    thumbnail = _jpeg((160, 80), RED)
+    client = FakeMinio({"ingest/a.jpg": _jpeg((2000, 1000), BLUE, _exif(6, thumbnail))})
+
+    _build_previews(client, BUCKET, "ingest/a.jpg", [128, 1024], 80)
+
+    assert _preview(client, "ingest/a.jpg", 128).size == (64, 128)
+    assert _preview(client, "ingest/a.jpg", 1024).size == (512, 1024)
+
+
+def test_failed_image_is_reported_as_none(monkeypatch):
+    client = FakeMinio({"ingest/good.jpg": _jpeg((400, 300), BLUE)})
+    monkeypatch.setattr(tasks_previews, "Minio", lambda **kwargs: client)
+    objects = [
+        MinioObject(BUCKET, "ingest/good.jpg"),
+        MinioObject(BUCKET, "ingest/missing.jpg"),
+        MinioObject(BUCKET, "previews/128/ingest/good.jpg"),
+        MinioObject(BUCKET, "ingest/notes.txt"),
+    ]
+
+    with disable_run_logger():
+        results = generate_image_previews.fn(objects, BUCKET, sizes=(256,))
+
+    assert results == {
+        "ingest/good.jpg": [preview_key("ingest/good.jpg", 256)],
+        "ingest/missing.jpg": None,
+    }